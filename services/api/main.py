@@ -1,12 +1,22 @@
 import os
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 # Import the timeseries builder
-from services.processor.timeseries_builder import build_ticker_timeseries
+# The hot endpoint returns the builder's TypedDict payload as-is (no Pydantic
+# re-validation); the models below only document the schema in /docs.
+from services.processor.timeseries_builder import (
+    TimeSeriesPayload,
+    build_ticker_timeseries_async,
+    data_version,
+    get_latest_daily_doc_async,
+)
 
 # ------------------------------
 # Load .env from project root
@@ -49,7 +59,9 @@ app = FastAPI(
     title="Financial News Sentiment Tracker API",
     version="1.0",
     description="API for price, sentiment, and correlation metrics.",
+    default_response_class=ORJSONResponse,
 )
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 
 # ------------------------------
@@ -89,8 +101,39 @@ def list_tickers():
 # ------------------------------
 # Time series for a ticker
 # ------------------------------
-@app.get("/ticker/{ticker}/timeseries", response_model=TimeSeriesResponse)
-def get_ticker_timeseries(
+_TS_CACHE: "OrderedDict[Tuple[str, int, str], TimeSeriesPayload]" = OrderedDict()
+_TS_CACHE_MAXSIZE = 512
+
+
+async def _cached_ts(ticker: str, days: int, version: str, latest_doc: Dict[str, Any]) -> TimeSeriesPayload:
+    """
+    Cache per (ticker, days, data version); a new aggregation or correlation run
+    changes the version, so stale entries are never served.
+    Small LRU on the event loop (single-threaded, so no locking needed).
+    Empty payloads are not cached.
+    """
+    key = (ticker, days, version)
+    data = _TS_CACHE.get(key)
+    if data is not None:
+        _TS_CACHE.move_to_end(key)
+        return data
+
+    data = await build_ticker_timeseries_async(ticker, days_back=days, latest_doc=latest_doc)
+    if data.get("points"):
+        _TS_CACHE[key] = data
+        if len(_TS_CACHE) > _TS_CACHE_MAXSIZE:
+            _TS_CACHE.popitem(last=False)
+    return data
+
+
+@app.get(
+    "/ticker/{ticker}/timeseries",
+    response_model=None,
+    responses={200: {"model": TimeSeriesResponse}},
+)
+async def get_ticker_timeseries(
+    request: Request,
+    response: Response,
     ticker: str,
     days: int = Query(
         7,
@@ -98,13 +141,27 @@ def get_ticker_timeseries(
         le=90,
         description="How many days to return (default: 7, max: 90)",
     ),
-):
+) -> Union[TimeSeriesPayload, Response]:
     ticker = ticker.upper()
 
     if ticker not in TICKERS:
         raise HTTPException(status_code=404, detail=f"Ticker {ticker} is not supported")
 
-    data = build_ticker_timeseries(ticker, days_back=days)
+    # One indexed point read; a cache hit or 304 needs nothing else
+    latest_doc = await get_latest_daily_doc_async(ticker)
+    if latest_doc is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No daily metrics found for ticker {ticker}",
+        )
+
+    version = data_version(latest_doc)
+    etag = f'W/"{ticker}-{days}-{version}"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    data = await _cached_ts(ticker, days, version, latest_doc)
 
     if not data.get("points"):
         raise HTTPException(
@@ -112,4 +169,5 @@ def get_ticker_timeseries(
             detail=f"No daily metrics found for ticker {ticker}",
         )
 
+    response.headers["ETag"] = etag
     return data
@@ -1,64 +1,110 @@
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 
 import requests
+import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API_BASE_URL = os.getenv("FNST_API_BASE_URL", "http://127.0.0.1:8000")
 NEON_GREEN = "#39ff14"
 RED_FALL = "#f97373"
 NEUTRAL_FLAT = "#9ca3af"
 
+# Shared HTTP session so API calls reuse keep-alive connections
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
 
 # --------------- API HELPERS ---------------
 
+# Cached so widget-driven reruns don't re-hit the API for the same arguments
+@st.cache_data(ttl=60, show_spinner=False)
 def fetch_tickers() -> List[str]:
     url = f"{API_BASE_URL}/tickers"
-    resp = requests.get(url, timeout=10)
+    resp = _SESSION.get(url, timeout=10)
     resp.raise_for_status()
     data = resp.json()
     return data.get("tickers", [])
 
 
-def fetch_timeseries(ticker: str, days: int) -> Dict[str, Any]:
+def _get_timeseries(ticker: str, days: int) -> Dict[str, Any]:
+    # Plain HTTP only (no st.* calls), so it is safe to run on worker threads
     url = f"{API_BASE_URL}/ticker/{ticker}/timeseries"
     params = {"days": days}
-    resp = requests.get(url, params=params, timeout=15)
+    resp = _SESSION.get(url, params=params, timeout=15)
     if resp.status_code == 404:
         return {"ticker": ticker, "points": []}
     resp.raise_for_status()
     return resp.json()
 
 
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_timeseries(ticker: str, days: int) -> Dict[str, Any]:
+    return _get_timeseries(ticker, days)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_timeseries_many(tickers: tuple, days: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Watchlist fetch. Cached as a whole from the script thread; only a miss
+    starts worker threads, which run the uncached HTTP helper concurrently.
+    Any failed request raises, so a partial batch is never cached.
+    """
+    with ThreadPoolExecutor(max_workers=len(tickers) or 1) as ex:
+        return dict(zip(tickers, ex.map(lambda tk: _get_timeseries(tk, days), tickers)))
+
+
+_DTYPES = {
+    "close_price": "float64",
+    "daily_return": "float64",
+    "avg_sentiment": "float64",
+    "article_count": "int32",
+    "rolling_corr_7d": "float64",
+}
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
 def build_dataframe(timeseries: Dict[str, Any]) -> pd.DataFrame:
     points = timeseries.get("points", [])
     if not points:
         return pd.DataFrame()
 
-    df = pd.DataFrame(points)
+    df = pd.DataFrame.from_records(points)
+    df = df.astype({k: v for k, v in _DTYPES.items() if k in df.columns}, errors="ignore")
 
-    numeric_cols = [
-        "close_price",
-        "daily_return",
-        "avg_sentiment",
-        "article_count",
-        "rolling_corr_7d",
-    ]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", cache=True)
 
     return df
 
 
 # --------------- SMALL HELPERS ---------------
 
+def is_missing(value) -> bool:
+    """Scalar NaN/None check (cheaper than pd.isna for single values)."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
 def sentiment_label(value: float) -> str:
-    if pd.isna(value):
+    if is_missing(value):
         return "Unknown"
     if value >= 0.2:
         return "Bullish"
@@ -68,7 +114,7 @@ def sentiment_label(value: float) -> str:
 
 
 def sentiment_class(value: float) -> str:
-    if pd.isna(value):
+    if is_missing(value):
         return "badge-neutral"
     if value >= 0.2:
         return "badge-bullish"
@@ -145,6 +191,22 @@ def apply_signal_axis_style(fig, dark_mode: bool, zero_line: bool = True):
     return fig
 
 
+def _segment_arrays(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pack the segments (x[i], x[i+1]) selected by mask into one polyline,
+    separated by gaps so Plotly draws them as a single trace.
+    """
+    idx = np.flatnonzero(mask)
+    xs = np.empty(idx.size * 3, dtype=object)
+    ys = np.full(idx.size * 3, np.nan)
+    xs[0::3] = x[idx]
+    xs[1::3] = x[idx + 1]
+    xs[2::3] = None
+    ys[0::3] = y[idx]
+    ys[1::3] = y[idx + 1]
+    return xs, ys
+
+
 def make_segmented_line(
     df: pd.DataFrame,
     x_col: str,
@@ -159,27 +221,20 @@ def make_segmented_line(
     if len(df) < 2 or y_col not in df.columns or x_col not in df.columns:
         return fig
 
-    for i in range(1, len(df)):
-        x_pair = [df[x_col].iloc[i - 1], df[x_col].iloc[i]]
-        y_prev = df[y_col].iloc[i - 1]
-        y_curr = df[y_col].iloc[i]
-
-        if pd.isna(y_prev) or pd.isna(y_curr):
-            continue
-
-        if y_curr > y_prev:
-            color = NEON_GREEN
-        elif y_curr < y_prev:
-            color = RED_FALL
-        else:
-            color = NEUTRAL_FLAT
+    x = df[x_col].to_numpy(dtype=object)
+    y = df[y_col].to_numpy(dtype=float)
+    # NaN on either side of a segment compares False everywhere, so it is skipped
+    diff = np.diff(y)
 
+    for mask, color in ((diff > 0, NEON_GREEN), (diff < 0, RED_FALL), (diff == 0, NEUTRAL_FLAT)):
+        xs, ys = _segment_arrays(x, y, mask)
         fig.add_trace(
             go.Scatter(
-                x=x_pair,
-                y=[y_prev, y_curr],
+                x=xs,
+                y=ys,
                 mode="lines",
                 line=dict(color=color, width=line_width),
+                connectgaps=False,
                 hoverinfo="skip",
                 showlegend=False,
             )
@@ -211,26 +266,19 @@ def make_price_chart(df: pd.DataFrame, dark_mode: bool, height: int = 430) -> go
         )
     )
 
-    for i in range(1, len(df_plot)):
-        x_pair = [df_plot["date"].iloc[i - 1], df_plot["date"].iloc[i]]
-        y_pair = [df_plot["close_price"].iloc[i - 1], df_plot["close_price"].iloc[i]]
-        prev_val = df_plot["close_price"].iloc[i - 1]
-        curr_val = df_plot["close_price"].iloc[i]
-
-        if pd.isna(prev_val) or pd.isna(curr_val):
-            continue
+    x = df_plot["date"].to_numpy(dtype=object)
+    y = df_plot["close_price"].to_numpy(dtype=float)
+    move = np.diff(y)
 
-        move = curr_val - prev_val
-        if abs(move) < 0.001:
-            continue
-
-        color = NEON_GREEN if move > 0 else RED_FALL
+    for mask, color in ((move >= 0.001, NEON_GREEN), (move <= -0.001, RED_FALL)):
+        xs, ys = _segment_arrays(x, y, mask)
         fig.add_trace(
             go.Scatter(
-                x=x_pair,
-                y=y_pair,
+                x=xs,
+                y=ys,
                 mode="lines",
                 line=dict(color=color, width=2.4),
+                connectgaps=False,
                 hoverinfo="skip",
                 showlegend=False,
             )
@@ -259,8 +307,15 @@ def make_price_chart(df: pd.DataFrame, dark_mode: bool, height: int = 430) -> go
 
 
 def make_sparkline(df: pd.DataFrame, dark_mode: bool) -> go.Figure:
-    fig = px.line(df, x="date", y="close_price")
-    fig.update_traces(line=dict(color=NEON_GREEN, width=1.8), hoverinfo="skip")
+    fig = go.Figure(
+        go.Scattergl(
+            x=df["date"],
+            y=df["close_price"],
+            mode="lines",
+            line=dict(color=NEON_GREEN, width=1.8),
+            hoverinfo="skip",
+        )
+    )
     fig.update_layout(
         showlegend=False,
         margin=dict(l=0, r=0, t=0, b=0),
@@ -272,10 +327,13 @@ def make_sparkline(df: pd.DataFrame, dark_mode: bool) -> go.Figure:
 
 
 def make_volume_bars(df: pd.DataFrame, dark_mode: bool, height: int = 180) -> go.Figure:
-    fig = px.bar(df, x="date", y="article_count", color_discrete_sequence=[NEON_GREEN])
-    fig.update_traces(
-        marker_line_width=0,
-        hovertemplate="<b>%{x|%b %d, %Y}</b><br>Articles: %{y}<extra>Volume</extra>",
+    fig = go.Figure(
+        go.Bar(
+            x=df["date"],
+            y=df["article_count"],
+            marker=dict(color=NEON_GREEN, line=dict(width=0)),
+            hovertemplate="<b>%{x|%b %d, %Y}</b><br>Articles: %{y}<extra>Volume</extra>",
+        )
     )
     fig.update_layout(height=height)
     fig = apply_chart_theme(fig, dark_mode)
@@ -381,7 +439,7 @@ def make_correlation_chart(df: pd.DataFrame, dark_mode: bool, height: int = 200)
 
 
 def build_signal_text(value: float, label: str, positive_hint: str, negative_hint: str) -> tuple[str, str]:
-    if pd.isna(value):
+    if is_missing(value):
         return "No signal", "Data missing"
     if value > 0:
         return label, positive_hint
@@ -394,10 +452,10 @@ def build_actionable_signals(df: pd.DataFrame) -> List[Dict[str, str]]:
     if df.empty:
         return []
 
-    latest = df.iloc[-1]
+    latest = df.iloc[-1].to_dict()
     latest_price = latest.get("close_price", float("nan"))
     latest_return = latest.get("daily_return", float("nan"))
-    latest_return_pct = latest_return * 100 if not pd.isna(latest_return) else float("nan")
+    latest_return_pct = latest_return * 100 if not is_missing(latest_return) else float("nan")
     latest_sentiment = latest.get("avg_sentiment", float("nan"))
     latest_articles = latest.get("article_count", float("nan"))
     latest_corr = latest.get("rolling_corr_7d", float("nan"))
@@ -408,7 +466,7 @@ def build_actionable_signals(df: pd.DataFrame) -> List[Dict[str, str]]:
 
     signals: List[Dict[str, str]] = []
 
-    if not pd.isna(latest_return_pct) and not pd.isna(latest_sentiment) and latest_return_pct < 0 and abs(latest_sentiment) < 0.15:
+    if not is_missing(latest_return_pct) and not is_missing(latest_sentiment) and latest_return_pct < 0 and abs(latest_sentiment) < 0.15:
         signals.append(
             {
                 "label": "Price / tone mismatch",
@@ -416,7 +474,7 @@ def build_actionable_signals(df: pd.DataFrame) -> List[Dict[str, str]]:
                 "tone": "warning",
             }
         )
-    elif not pd.isna(latest_return_pct) and latest_return_pct > 0 and not pd.isna(latest_sentiment) and latest_sentiment > 0.15:
+    elif not is_missing(latest_return_pct) and latest_return_pct > 0 and not is_missing(latest_sentiment) and latest_sentiment > 0.15:
         signals.append(
             {
                 "label": "Price / tone alignment",
@@ -433,7 +491,7 @@ def build_actionable_signals(df: pd.DataFrame) -> List[Dict[str, str]]:
             }
         )
 
-    if not pd.isna(latest_articles) and not pd.isna(recent_articles_avg) and recent_articles_avg > 0:
+    if not is_missing(latest_articles) and not is_missing(recent_articles_avg) and recent_articles_avg > 0:
         if latest_articles > recent_articles_avg * 1.2:
             signals.append(
                 {
@@ -459,7 +517,7 @@ def build_actionable_signals(df: pd.DataFrame) -> List[Dict[str, str]]:
             }
         )
 
-    if not pd.isna(latest_corr):
+    if not is_missing(latest_corr):
         if abs(latest_corr) < 0.25:
             signals.append(
                 {
@@ -524,10 +582,19 @@ def render_ticker_watchlist(tickers: List[str], days: int, dark_mode: bool, sele
 
     cols = st.columns(top_n)
 
+    # The selected ticker is already in fetch_timeseries's cache from main();
+    # only the other cards go through the concurrent batch fetch.
+    others = tuple(sorted(tk for tk in watchlist_tickers if tk != selected_ticker))
+    try:
+        results = fetch_timeseries_many(others, days) if others else {}
+    except Exception:
+        # Nothing was cached; each card retries below and shows its own error
+        results = {}
+
     for i, tk in enumerate(watchlist_tickers):
         with cols[i]:
             try:
-                ts_card = fetch_timeseries(tk, days)
+                ts_card = results[tk] if tk in results else fetch_timeseries(tk, days)
                 df_card = build_dataframe(ts_card)
                 if df_card.empty:
                     st.markdown(
@@ -537,11 +604,11 @@ def render_ticker_watchlist(tickers: List[str], days: int, dark_mode: bool, sele
                     )
                     continue
 
-                latest = df_card.iloc[-1]
+                latest = df_card.iloc[-1].to_dict()
                 price = latest.get("close_price", float("nan"))
                 daily_ret = latest.get("daily_return", float("nan"))
-                daily_ret_pct = daily_ret * 100 if not pd.isna(daily_ret) else float("nan")
-                trend_label = "Up" if not pd.isna(daily_ret_pct) and daily_ret_pct >= 0 else "Down"
+                daily_ret_pct = daily_ret * 100 if not is_missing(daily_ret) else float("nan")
+                trend_label = "Up" if not is_missing(daily_ret_pct) and daily_ret_pct >= 0 else "Down"
                 is_selected = tk == selected_ticker
                 card_class = "market-card selected" if is_selected else "market-card"
 
@@ -576,88 +643,29 @@ def render_ticker_watchlist(tickers: List[str], days: int, dark_mode: bool, sele
     st.markdown("</div>", unsafe_allow_html=True)
 
 
-# --------------- MAIN UI ---------------
-
-def main():
-    st.set_page_config(
-        page_title="Financial News Sentiment Tracker",
-        layout="wide",
-        initial_sidebar_state="expanded",
-    )
-
-    if "dark_mode" not in st.session_state:
-        st.session_state.dark_mode = True
-
-    # --------------- SIDEBAR ---------------
-
-    with st.sidebar:
-        st.markdown(
-            """
-            <div class="rail-brand">
-                <div>
-                    <div class="rail-title">Market Dashboard</div>
-                    <div class="rail-subtitle">Financial News Sentiment Tracker</div>
-                </div>
-            </div>
-            <div class="rail-divider" aria-hidden="true"></div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        # Enforce dark mode (remove Light theme option)
-        st.session_state.dark_mode = True
-        dark_mode = True
-
-        try:
-            tickers = fetch_tickers()
-        except Exception as e:
-            st.error(f"Failed to load tickers from API: {e}")
-            return
-
-        if not tickers:
-            st.error("No tickers available from API.")
-            return
-
-        ticker_index = st.session_state.get("ticker_index", 0)
-        if ticker_index >= len(tickers):
-            ticker_index = 0
-
-        ticker = st.selectbox("Ticker", options=tickers, index=ticker_index, key="ticker_choice")
-        st.session_state.ticker_index = tickers.index(ticker)
-
-        window_choice = choose_segmented("Window", ["7D", "14D", "30D"], default_index=1, key="window_choice")
-        days = {"7D": 7, "14D": 14, "30D": 30}[window_choice]
-
-        st.markdown('<div class="rail-section">', unsafe_allow_html=True)
-        st.markdown('<div class="rail-label">Control summary</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="rail-chip">{window_choice}</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        status_slot = st.empty()
-
-        st.caption(f"API base: {API_BASE_URL}")
-
-    # --------------- THEME CSS ---------------
-
-    if dark_mode:
-        bg_color = "#050b16"
-        text_color = "#e5e7eb"
-        subtext_color = "#9ca3af"
-        panel_bg = "#0b1424"
-        panel_bg_alt = "#101b2e"
-        card_border = "rgba(148,163,184,0.18)"
-        shadow = "0 10px 26px rgba(0,0,0,0.28)"
-    else:
-        bg_color = "#e5e7eb"
-        text_color = "#111827"
-        subtext_color = "#4b5563"
-        panel_bg = "#f8fafc"
-        panel_bg_alt = "#eef2f7"
-        card_border = "rgba(148,163,184,0.22)"
-        shadow = "0 10px 22px rgba(15,23,42,0.08)"
-
-    st.markdown(
-        f"""
+# --------------- THEME CSS ---------------
+
+_THEME_DARK = dict(
+    bg_color="#050b16",
+    text_color="#e5e7eb",
+    subtext_color="#9ca3af",
+    panel_bg="#0b1424",
+    panel_bg_alt="#101b2e",
+    card_border="rgba(148,163,184,0.18)",
+    shadow="0 10px 26px rgba(0,0,0,0.28)",
+)
+
+_THEME_LIGHT = dict(
+    bg_color="#e5e7eb",
+    text_color="#111827",
+    subtext_color="#4b5563",
+    panel_bg="#f8fafc",
+    panel_bg_alt="#eef2f7",
+    card_border="rgba(148,163,184,0.22)",
+    shadow="0 10px 22px rgba(15,23,42,0.08)",
+)
+
+_CSS_TEMPLATE = """
         <style>
         body {{
             background-color: {bg_color};
@@ -1081,10 +1089,126 @@ def main():
             color:{text_color};
         }}
         </style>
-        """,
-        unsafe_allow_html=True,
+"""
+
+# Rendered once at import; reruns only pick the right string
+_CSS_DARK = _CSS_TEMPLATE.format(NEON_GREEN=NEON_GREEN, RED_FALL=RED_FALL, **_THEME_DARK)
+_CSS_LIGHT = _CSS_TEMPLATE.format(NEON_GREEN=NEON_GREEN, RED_FALL=RED_FALL, **_THEME_LIGHT)
+
+
+# --------------- HEADER ---------------
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_header_html(
+    ticker: str,
+    latest_price: float,
+    latest_return_pct: float,
+    price_change_class: str,
+    sentiment_tag: str,
+    latest_articles: int,
+    from_date: str,
+    to_date: str,
+) -> str:
+    return f"""
+        <div class="glass-card hero-shell">
+            <div class="hero-main">
+                <div>
+                    <div class="hero-title">Selected ticker</div>
+                    <div class="hero-value">{ticker}</div>
+                    <div class="hero-subtitle">View how price, sentiment, and news activity have moved together over the last 14 days</div>
+                </div>
+                <div class="hero-state-row">
+                    <div class="hero-pill">
+                        <span class="hero-pill-label">Price</span>
+                        <span class="hero-pill-value">{latest_price:.2f}</span>
+                    </div>
+                    <div class="hero-pill">
+                        <span class="hero-pill-label">Return</span>
+                        <span class="hero-pill-value {price_change_class}">{latest_return_pct:+.2f}%</span>
+                    </div>
+                    <div class="hero-pill">
+                        <span class="hero-pill-label">Sentiment</span>
+                        <span class="hero-pill-value">{sentiment_tag}</span>
+                    </div>
+                    <div class="hero-pill">
+                        <span class="hero-pill-label">Articles</span>
+                        <span class="hero-pill-value">{latest_articles}</span>
+                    </div>
+                    <div class="hero-pill">
+                        <span class="hero-pill-label">Date range</span>
+                        <span class="hero-pill-value">{from_date} to {to_date}</span>
+                    </div>
+                </div>
+            </div>
+        </div>
+        """
+
+
+# --------------- MAIN UI ---------------
+
+def main():
+    st.set_page_config(
+        page_title="Financial News Sentiment Tracker",
+        layout="wide",
+        initial_sidebar_state="expanded",
     )
 
+    if "dark_mode" not in st.session_state:
+        st.session_state.dark_mode = True
+
+    # --------------- SIDEBAR ---------------
+
+    with st.sidebar:
+        st.markdown(
+            """
+            <div class="rail-brand">
+                <div>
+                    <div class="rail-title">Market Dashboard</div>
+                    <div class="rail-subtitle">Financial News Sentiment Tracker</div>
+                </div>
+            </div>
+            <div class="rail-divider" aria-hidden="true"></div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+        # Enforce dark mode (remove Light theme option)
+        st.session_state.dark_mode = True
+        dark_mode = True
+
+        try:
+            tickers = fetch_tickers()
+        except Exception as e:
+            st.error(f"Failed to load tickers from API: {e}")
+            return
+
+        if not tickers:
+            st.error("No tickers available from API.")
+            return
+
+        ticker_index = st.session_state.get("ticker_index", 0)
+        if ticker_index >= len(tickers):
+            ticker_index = 0
+
+        ticker = st.selectbox("Ticker", options=tickers, index=ticker_index, key="ticker_choice")
+        st.session_state.ticker_index = tickers.index(ticker)
+
+        window_choice = choose_segmented("Window", ["7D", "14D", "30D"], default_index=1, key="window_choice")
+        days = {"7D": 7, "14D": 14, "30D": 30}[window_choice]
+
+        st.markdown('<div class="rail-section">', unsafe_allow_html=True)
+        st.markdown('<div class="rail-label">Control summary</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="rail-chip">{window_choice}</div>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        status_slot = st.empty()
+
+        st.caption(f"API base: {API_BASE_URL}")
+
+    # --------------- THEME CSS ---------------
+
+    st.markdown(_CSS_DARK if dark_mode else _CSS_LIGHT, unsafe_allow_html=True)
+
     # --------------- FETCH MAIN DATA ---------------
 
     with st.spinner(f"Loading data for {ticker} ..."):
@@ -1103,17 +1227,17 @@ def main():
     from_date = ts.get("from_date", "")
     to_date = ts.get("to_date", "")
 
-    latest = df.iloc[-1]
+    latest = df.iloc[-1].to_dict()
     latest_sentiment = latest.get("avg_sentiment", float("nan"))
     sentiment_tag = sentiment_label(latest_sentiment)
     sentiment_css_class = sentiment_class(latest_sentiment)
     latest_price = latest.get("close_price", float("nan"))
     latest_return = latest.get("daily_return", float("nan"))
-    latest_return_pct = latest_return * 100 if not pd.isna(latest_return) else float("nan")
+    latest_return_pct = latest_return * 100 if not is_missing(latest_return) else float("nan")
     latest_articles = int(latest.get("article_count", 0))
     latest_corr = latest.get("rolling_corr_7d", float("nan"))
-    price_change_class = "pos" if not pd.isna(latest_return_pct) and latest_return_pct >= 0 else "neg"
-    price_move_label = "Uptrend" if not pd.isna(latest_return_pct) and latest_return_pct >= 0 else "Downtrend"
+    price_change_class = "pos" if not is_missing(latest_return_pct) and latest_return_pct >= 0 else "neg"
+    price_move_label = "Uptrend" if not is_missing(latest_return_pct) and latest_return_pct >= 0 else "Downtrend"
     corr_label, corr_note = build_signal_text(
         latest_corr,
         "Correlation",
@@ -1166,39 +1290,16 @@ def main():
     # --------------- HEADER ---------------
 
     st.markdown(
-        f"""
-        <div class="glass-card hero-shell">
-            <div class="hero-main">
-                <div>
-                    <div class="hero-title">Selected ticker</div>
-                    <div class="hero-value">{ticker}</div>
-                    <div class="hero-subtitle">View how price, sentiment, and news activity have moved together over the last 14 days</div>
-                </div>
-                <div class="hero-state-row">
-                    <div class="hero-pill">
-                        <span class="hero-pill-label">Price</span>
-                        <span class="hero-pill-value">{latest_price:.2f}</span>
-                    </div>
-                    <div class="hero-pill">
-                        <span class="hero-pill-label">Return</span>
-                        <span class="hero-pill-value {price_change_class}">{latest_return_pct:+.2f}%</span>
-                    </div>
-                    <div class="hero-pill">
-                        <span class="hero-pill-label">Sentiment</span>
-                        <span class="hero-pill-value">{sentiment_tag}</span>
-                    </div>
-                    <div class="hero-pill">
-                        <span class="hero-pill-label">Articles</span>
-                        <span class="hero-pill-value">{latest_articles}</span>
-                    </div>
-                    <div class="hero-pill">
-                        <span class="hero-pill-label">Date range</span>
-                        <span class="hero-pill-value">{from_date} to {to_date}</span>
-                    </div>
-                </div>
-            </div>
-        </div>
-        """,
+        build_header_html(
+            ticker,
+            latest_price,
+            latest_return_pct,
+            price_change_class,
+            sentiment_tag,
+            latest_articles,
+            from_date,
+            to_date,
+        ),
         unsafe_allow_html=True,
     )
 
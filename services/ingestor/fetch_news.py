@@ -1,9 +1,12 @@
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
 import requests
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pymongo import MongoClient, ASCENDING, UpdateOne
 
 # Load .env from project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,29 +20,75 @@ MONGO_DB_NAME = os.getenv("MONGO_DB", "financial_news")
 # Small dev ticker set – we can expand later
 TICKERS = ["AAPL", "MSFT", "TSLA", "NVDA"]
 
+# Max upserts per bulk_write call (keeps each request well under the 16MB BSON limit)
+BULK_CHUNK_SIZE = 1000
+
+# Shared HTTP session so Finnhub calls reuse keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+# One client (and connection pool) per process, shared by every caller
+_CLIENT = MongoClient(MONGO_URI, maxPoolSize=50, minPoolSize=5, socketTimeoutMS=5000)
+_initialized = False
+
 
 def get_mongo_collection():
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
-    coll = db["news_events"]
-
-    # Ensure unique documents
-    coll.create_index(
-        [("ticker", ASCENDING), ("headline", ASCENDING), ("published_at", ASCENDING)],
-        unique=True,
-        name="uniq_ticker_headline_published",
-    )
+    """
+    Return the news_events collection, creating its indexes once per process.
+
+    Consumers reading a ticker's news over a time range should project only
+    the fields they need, e.g.
+        coll.find(
+            {"ticker": t, "published_at": {"$gte": start, "$lt": end}},
+            {"headline": 1, "sentiment_score": 1, "published_at": 1, "_id": 0},
+        )
+    so whole documents are not shipped over the wire.
+    """
+    global _initialized
+    coll = _CLIENT[MONGO_DB_NAME]["news_events"]
+
+    if not _initialized:
+        # Ensure unique documents
+        coll.create_index(
+            [("ticker", ASCENDING), ("headline", ASCENDING), ("published_at", ASCENDING)],
+            unique=True,
+            name="uniq_ticker_headline_published",
+        )
+        # Range scans by ticker + time (the unique index has headline in between)
+        coll.create_index(
+            [("ticker", ASCENDING), ("published_at", ASCENDING)],
+            name="ticker_pub_range",
+        )
+        _initialized = True
 
     return coll
 
 
-def fetch_news_for_ticker(ticker: str, days_back: int = 30):
+def fetch_news_for_ticker(ticker: str, days_back: int = 30, start_date=None):
+    """
+    Fetch company news from Finnhub. The window starts at start_date when
+    given (clamped to at most days_back days ago), otherwise days_back days ago.
+    """
     if not FINNHUB_API_KEY:
         raise RuntimeError("FINNHUB_API_KEY is not set in .env")
 
     url = "https://finnhub.io/api/v1/company-news"
-    today = datetime.utcnow().date()
+    today = datetime.now(timezone.utc).date()
     start = today - timedelta(days=days_back)
+    if start_date is not None:
+        start = max(start, start_date)
 
     params = {
         "symbol": ticker,
@@ -48,13 +97,17 @@ def fetch_news_for_ticker(ticker: str, days_back: int = 30):
         "token": FINNHUB_API_KEY,
     }
 
-    resp = requests.get(url, params=params, timeout=10)
+    resp = _SESSION.get(url, params=params, timeout=10)
     resp.raise_for_status()
     return resp.json()
 
 
 def insert_news_batch(coll, ticker: str, items: list):
-    inserted = 0
+    ops = []
+    # One ingestion timestamp for the whole batch
+    ingested_at = datetime.now(timezone.utc)
+    # Finnhub can repeat an article within one response; skip those before Mongo
+    seen = set()
 
     for item in items:
         headline = item.get("headline") or ""
@@ -63,6 +116,12 @@ def insert_news_batch(coll, ticker: str, items: list):
 
         # Convert timestamp → timezone-aware datetime in UTC
         published_at = datetime.fromtimestamp(item["datetime"], tz=timezone.utc)
+
+        key = (ticker, headline, published_at)
+        if key in seen:
+            continue
+        seen.add(key)
+
         url = item.get("url")
         source = item.get("source", "unknown")
 
@@ -74,34 +133,63 @@ def insert_news_batch(coll, ticker: str, items: list):
             "sentiment_label": None,
             "sentiment_score": None,
             "published_at": published_at,
-            "ingested_at": datetime.now(timezone.utc),  # FIXED
+            "ingested_at": ingested_at,
             "url": url,
         }
 
-        result = coll.update_one(
-            {
-                "ticker": ticker,
-                "headline": headline,
-                "published_at": published_at,
-            },
-            {"$setOnInsert": doc},
-            upsert=True,
+        ops.append(
+            UpdateOne(
+                {
+                    "ticker": ticker,
+                    "headline": headline,
+                    "published_at": published_at,
+                },
+                {"$setOnInsert": doc},
+                upsert=True,
+            )
         )
 
-        if result.upserted_id is not None:
-            inserted += 1
+    inserted = 0
+    for i in range(0, len(ops), BULK_CHUNK_SIZE):
+        result = coll.bulk_write(ops[i : i + BULK_CHUNK_SIZE], ordered=False)
+        inserted += len(result.upserted_ids)
+
+    return inserted
+
 
+def get_latest_published(coll):
+    """
+    Return a dict: ticker -> latest published_at already stored in Mongo.
+    """
+    cursor = coll.aggregate(
+        [
+            {"$match": {"ticker": {"$in": TICKERS}}},
+            {"$group": {"_id": "$ticker", "last": {"$max": "$published_at"}}},
+        ]
+    )
+    return {doc["_id"]: doc["last"] for doc in cursor if doc.get("last") is not None}
+
+
+def _fetch_and_insert(coll, ticker: str, watermark=None):
+    # Re-fetch one day before the watermark so late-published items aren't missed
+    start_date = watermark.date() - timedelta(days=1) if watermark is not None else None
+    print(f"Fetching news for {ticker}" + (f" since {start_date}..." if start_date else "..."))
+    data = fetch_news_for_ticker(ticker, start_date=start_date)
+    inserted = insert_news_batch(coll, ticker, data)
+    print(f"{ticker}: fetched {len(data)} items, inserted {inserted} new docs.")
     return inserted
 
 
 def run_ingestor():
     coll = get_mongo_collection()
-
-    for ticker in TICKERS:
-        print(f"Fetching news for {ticker}...")
-        data = fetch_news_for_ticker(ticker)
-        inserted = insert_news_batch(coll, ticker, data)
-        print(f"{ticker}: fetched {len(data)} items, inserted {inserted} new docs.")
+    watermarks = get_latest_published(coll)
+
+    # Tickers are independent and I/O-bound, so fetch them concurrently.
+    # The shared MongoClient pool is thread-safe.
+    with ThreadPoolExecutor(max_workers=len(TICKERS)) as ex:
+        futures = {ex.submit(_fetch_and_insert, coll, t, watermarks.get(t)): t for t in TICKERS}
+        for future in as_completed(futures):
+            future.result()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,11 @@
 import os
-import time
-from datetime import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import yfinance as yf
 import pandas as pd
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne
 
 # Load .env from project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -18,31 +18,37 @@ MONGO_DB_NAME = os.getenv("MONGO_DB", "financial_news")
 # Same ticker set as news
 TICKERS = ["AAPL", "MSFT", "TSLA", "NVDA"]
 
+# US listings; daily bars are stamped at exchange-local midnight
+EXCHANGE_TZ = "America/New_York"
+
+# Max upserts per bulk_write call (keeps each request well under the 16MB BSON limit)
+BULK_CHUNK_SIZE = 1000
+
+# One client (and connection pool) per process, shared by every caller
+_CLIENT = MongoClient(MONGO_URI, maxPoolSize=50, minPoolSize=5, socketTimeoutMS=5000)
+_initialized = False
+
 
 def get_price_collection():
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
-    coll = db["price_snapshots"]
-
-    coll.create_index(
-        [("ticker", ASCENDING), ("ts", ASCENDING)],
-        unique=True,
-        name="uniq_ticker_ts",
-    )
+    global _initialized
+    coll = _CLIENT[MONGO_DB_NAME]["price_snapshots"]
+
+    if not _initialized:
+        coll.create_index(
+            [("ticker", ASCENDING), ("ts", ASCENDING)],
+            unique=True,
+            name="uniq_ticker_ts",
+        )
+        _initialized = True
 
     return coll
 
 
-def fetch_daily_prices_yf(ticker: str, period: str = "90d"):
+def _df_to_candles(df: pd.DataFrame, ticker: str):
     """
-    Fetch daily OHLCV data from Yahoo Finance using the Ticker.history API.
-    This avoids the MultiIndex / group_by weirdness of yf.download.
+    Convert a single-ticker OHLCV DataFrame from yfinance into candle dicts.
     """
-    t = yf.Ticker(ticker)
-    df = t.history(period=period, interval="1d", auto_adjust=False)
-
     if df.empty:
-        print(f"[WARN] No price data returned for {ticker} from yfinance.history().")
         return []
 
     # Ensure simple string column names
@@ -58,48 +64,101 @@ def fetch_daily_prices_yf(ticker: str, period: str = "90d"):
         print(f"[WARN] No 'Close' or 'Adj Close' column for {ticker}. Columns: {list(df.columns)}")
         return []
 
-    candles = []
-    for idx, row in df.iterrows():
-        # idx is a pandas Timestamp
-        dt = datetime.utcfromtimestamp(idx.timestamp())
+    df = df.rename(
+        columns={close_col: "close", "Open": "open", "High": "high", "Low": "low", "Volume": "volume"}
+    )
+    price_cols = ["open", "high", "low", "close"]
+    df = df.dropna(subset=price_cols).copy()
+    if df.empty:
+        return []
+
+    df[price_cols] = df[price_cols].astype(float)
 
-        close_val = row.get(close_col, None)
-        if pd.isna(close_val):
-            continue
+    if "volume" in df.columns:
+        df["volume"] = pd.to_numeric(df["volume"], errors="coerce").fillna(0.0).astype(float)
+    else:
+        df["volume"] = 0.0
+
+    # Store naive UTC timestamps (New York midnight -> 04:00/05:00 UTC), the
+    # key Ticker.history has always produced. A naive index is exchange-local.
+    idx = df.index
+    if idx.tz is None:
+        idx = idx.tz_localize(EXCHANGE_TZ)
+    idx = idx.tz_convert("UTC").tz_localize(None)
+    df["ts"] = idx.to_pydatetime()
+    df["ticker"] = ticker
+    df["source"] = "yfinance_history"
 
-        open_val = row.get("Open", None)
-        high_val = row.get("High", None)
-        low_val = row.get("Low", None)
-        vol_val = row.get("Volume", 0.0)
+    cols = ["ticker", "ts", "open", "high", "low", "close", "volume", "source"]
+    return df[cols].to_dict("records")
 
-        if any(pd.isna(v) for v in [open_val, high_val, low_val]):
+
+def fetch_daily_prices_yf(ticker: str, period: str = "90d"):
+    """
+    Fetch daily OHLCV data for one ticker using the Ticker.history API.
+    """
+    t = yf.Ticker(ticker)
+    df = t.history(period=period, interval="1d", auto_adjust=False)
+
+    if df.empty:
+        print(f"[WARN] No price data returned for {ticker} from yfinance.history().")
+        return []
+
+    return _df_to_candles(df, ticker)
+
+
+def fetch_daily_prices_batch_yf(tickers, period: str = "90d"):
+    """
+    Fetch daily OHLCV data for all tickers in a single yf.download call.
+    Returns a dict: ticker -> list of candle dicts.
+    """
+    data = yf.download(
+        " ".join(tickers),
+        period=period,
+        interval="1d",
+        group_by="ticker",
+        auto_adjust=False,
+        # Keep the exchange tz on the index so ts matches the Ticker.history path
+        ignore_tz=False,
+        threads=True,
+        progress=False,
+    )
+
+    available = set()
+    if not data.empty and isinstance(data.columns, pd.MultiIndex):
+        available = set(data.columns.get_level_values(0))
+
+    result = {}
+    for ticker in tickers:
+        if ticker not in available:
+            print(f"[WARN] No price data returned for {ticker} from yfinance.download().")
+            result[ticker] = []
             continue
 
-        try:
-            vol_val = float(vol_val)
-        except Exception:
-            vol_val = 0.0
+        sub = data[ticker].dropna(how="all")
+        result[ticker] = _df_to_candles(sub, ticker)
 
-        candles.append(
-            {
-                "ticker": ticker,
-                "ts": dt,
-                "open": float(open_val),
-                "high": float(high_val),
-                "low": float(low_val),
-                "close": float(close_val),
-                "volume": vol_val,
-                "source": "yfinance_history",
-            }
-        )
+    return result
 
-    return candles
+
+def check_batch_ts_matches_history(ticker: str = "AAPL", period: str = "5d"):
+    """
+    Compare candle ts values from the batch download with Ticker.history.
+    (ticker, ts) is the unique key, so any drift would duplicate every day.
+    """
+    history_ts = [c["ts"] for c in fetch_daily_prices_yf(ticker, period=period)]
+    batch_ts = [c["ts"] for c in fetch_daily_prices_batch_yf([ticker], period=period)[ticker]]
+
+    if history_ts != batch_ts:
+        raise RuntimeError(
+            f"{ticker}: batch ts {batch_ts[:3]}... differ from Ticker.history ts {history_ts[:3]}..."
+        )
+    print(f"{ticker}: batch and Ticker.history ts match ({len(batch_ts)} candles).")
 
 
 def upsert_candles(coll, candles):
-    inserted = 0
-    for candle in candles:
-        result = coll.update_one(
+    ops = [
+        UpdateOne(
             {
                 "ticker": candle["ticker"],
                 "ts": candle["ts"],
@@ -107,24 +166,44 @@ def upsert_candles(coll, candles):
             {"$setOnInsert": candle},
             upsert=True,
         )
-        if result.upserted_id is not None:
-            inserted += 1
+        for candle in candles
+    ]
+
+    inserted = 0
+    for i in range(0, len(ops), BULK_CHUNK_SIZE):
+        result = coll.bulk_write(ops[i : i + BULK_CHUNK_SIZE], ordered=False)
+        inserted += len(result.upserted_ids)
     return inserted
 
 
-def run_price_fetcher(period: str = "90d", sleep_between: float = 0.5):
+def _upsert_ticker(coll, ticker: str, candles):
+    print(f"{ticker}: fetched {len(candles)} candles from yfinance.download().")
+    if not candles:
+        return 0
+    inserted = upsert_candles(coll, candles)
+    print(f"{ticker}: inserted {inserted} new documents into Mongo.")
+    return inserted
+
+
+def run_price_fetcher(period: str = "90d"):
     coll = get_price_collection()
 
-    for ticker in TICKERS:
-        print(f"Fetching {period} of daily prices for {ticker} from yfinance.history()...")
-        candles = fetch_daily_prices_yf(ticker, period=period)
-        print(f"{ticker}: fetched {len(candles)} candles from yfinance.history().")
-        if not candles:
-            continue
-        inserted = upsert_candles(coll, candles)
-        print(f"{ticker}: inserted {inserted} new documents into Mongo.")
-        time.sleep(sleep_between)
+    print(f"Fetching {period} of daily prices for {', '.join(TICKERS)} from yfinance.download()...")
+    candles_by_ticker = fetch_daily_prices_batch_yf(TICKERS, period=period)
+
+    # Per-ticker upserts are independent, so run them concurrently.
+    # The shared MongoClient pool is thread-safe.
+    with ThreadPoolExecutor(max_workers=len(TICKERS)) as ex:
+        futures = {
+            ex.submit(_upsert_ticker, coll, t, candles_by_ticker.get(t, [])): t
+            for t in TICKERS
+        }
+        for future in as_completed(futures):
+            future.result()
 
 
 if __name__ == "__main__":
-    run_price_fetcher()
+    if "--check-ts" in sys.argv:
+        check_batch_ts_matches_history()
+    else:
+        run_price_fetcher()
@@ -1,9 +1,13 @@
+import math
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, date, UTC  # Added UTC here
-from collections import Counter
+from functools import lru_cache
 
+import numpy as np
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne
 
 # Load .env from project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,10 +20,23 @@ MONGO_DB_NAME = os.getenv("MONGO_DB", "financial_news")
 # Same ticker set as before
 TICKERS = ["AAPL", "MSFT", "TSLA", "NVDA"]
 
+# Max upserts per bulk_write call
+BULK_CHUNK_SIZE = 1000
+
+# Labels written by the sentiment worker
+SENTIMENT_LABELS = ["bullish", "bearish", "neutral"]
+
+
+@lru_cache(maxsize=1)
+def _client():
+    """
+    One MongoClient (and connection pool) per process, created on first use.
+    """
+    return MongoClient(MONGO_URI, maxPoolSize=50)
+
 
 def get_collections():
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
+    db = _client()[MONGO_DB_NAME]
     news = db["news_events"]
     prices = db["price_snapshots"]
     daily = db["daily_ticker_metrics"]
@@ -30,6 +47,13 @@ def get_collections():
         name="uniq_ticker_date",
     )
 
+    # Per-ticker published_at range scans in aggregate_sentiment_by_day.
+    # Same spec/name the ingestor creates, so this is a no-op if it already exists.
+    news.create_index(
+        [("ticker", ASCENDING), ("published_at", ASCENDING)],
+        name="ticker_pub_range",
+    )
+
     return news, prices, daily
 
 
@@ -45,73 +69,70 @@ def build_price_series(prices_coll, ticker: str):
     """
     cursor = prices_coll.find(
         {"ticker": ticker},
+        {"ts": 1, "close": 1, "_id": 0},
         sort=[("ts", ASCENDING)],
+        batch_size=5000,
     )
 
     rows = list(cursor)
     if not rows:
         return {}
 
-    series = []
-    for doc in rows:
-        ts: datetime = doc["ts"]  # naive datetime from yfinance
-        d = ts.date()
-        close = float(doc["close"])
-        series.append((d, close))
+    # ts is a naive datetime from yfinance
+    dates = [doc["ts"].date() for doc in rows]
+    closes = np.fromiter((doc["close"] for doc in rows), dtype=np.float64, count=len(rows))
 
-    result = {}
-    prev_close = None
-    for d, close in series:
-        if prev_close is None:
-            daily_ret = None
-        else:
-            daily_ret = (close - prev_close) / prev_close if prev_close != 0 else None
-        result[d] = {
+    # Simple returns; undefined for the first row and after a zero close
+    rets = np.full_like(closes, np.nan)
+    prev = closes[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets[1:] = np.where(prev != 0, np.diff(closes) / prev, np.nan)
+
+    return {
+        d: {
             "close_price": close,
-            "daily_return": daily_ret,
+            "daily_return": None if math.isnan(ret) else ret,
         }
-        prev_close = close
-
-    return result
+        for d, close, ret in zip(dates, closes.tolist(), rets.tolist())
+    }
 
 
-def aggregate_sentiment_for_day(news_coll, ticker: str, d: date):
+def aggregate_sentiment_by_day(news_coll, ticker: str, start_date: date):
     """
-    Aggregate sentiment for (ticker, date) from news_events.
-    Returns (avg_sentiment_score, dominant_label, article_count)
+    Aggregate sentiment per day for a ticker from news_events in one $group pass.
+    Returns a dict: date -> (avg_sentiment_score, dominant_label, article_count)
     """
-    day_start = start_of_day(d)
-    day_end = day_start + timedelta(days=1)
-
-    cursor = news_coll.find(
+    pipeline = [
         {
-            "ticker": ticker,
-            "published_at": {"$gte": day_start, "$lt": day_end},
-            "sentiment_score": {"$ne": None},
+            "$match": {
+                "ticker": ticker,
+                "published_at": {"$gte": start_of_day(start_date)},
+                "sentiment_score": {"$ne": None},
+            }
         },
-        {"sentiment_score": 1, "sentiment_label": 1},
-    )
-
-    docs = list(cursor)
-    if not docs:
-        return None, None, 0
-
-    scores = [float(doc["sentiment_score"]) for doc in docs if "sentiment_score" in doc]
-    labels = [doc.get("sentiment_label") for doc in docs if doc.get("sentiment_label")]
-
-    avg_score = sum(scores) / len(scores) if scores else None
+        {
+            "$group": {
+                "_id": {"$dateTrunc": {"date": "$published_at", "unit": "day"}},
+                "avg": {"$avg": "$sentiment_score"},
+                "n": {"$sum": 1},
+                **{
+                    label: {"$sum": {"$cond": [{"$eq": ["$sentiment_label", label]}, 1, 0]}}
+                    for label in SENTIMENT_LABELS
+                },
+            }
+        },
+    ]
 
-    if labels:
-        counter = Counter(labels)
-        dominant = counter.most_common(1)[0][0]
-    else:
-        dominant = None
+    result = {}
+    for doc in news_coll.aggregate(pipeline):
+        counts = {label: doc[label] for label in SENTIMENT_LABELS if doc[label] > 0}
+        dominant = max(counts, key=counts.get) if counts else None
+        result[doc["_id"].date()] = (doc["avg"], dominant, doc["n"])
 
-    return avg_score, dominant, len(docs)
+    return result
 
 
 def upsert_daily_metric(
-    daily_coll,
     ticker: str,
     d: date,
     close_price,
@@ -119,14 +140,15 @@ def upsert_daily_metric(
     avg_sentiment,
     dominant_label,
     article_count,
+    updated_at: datetime,
 ):
     """
-    Upsert one document into daily_ticker_metrics.
+    Build the upsert op for one daily_ticker_metrics document.
     Store `date` as a datetime at midnight (Mongo-friendly).
     """
     date_dt = start_of_day(d)
 
-    daily_coll.update_one(
+    return UpdateOne(
         {
             "ticker": ticker,
             "date": date_dt,
@@ -140,53 +162,274 @@ def upsert_daily_metric(
                 "avg_sentiment_score": avg_sentiment,
                 "dominant_sentiment_label": dominant_label,
                 "article_count": article_count,
-                "updated_at": datetime.now(UTC),  # Fixed NameError here
+                "updated_at": updated_at,
             }
         },
         upsert=True,
     )
 
 
-def run_daily_aggregation(days_back: int = 90):
-    news_coll, prices_coll, daily_coll = get_collections()
+def build_daily_rows(news_coll, prices_coll, ticker: str, start_date: date):
+    """
+    Compute the daily_ticker_metrics rows for a ticker from start_date on,
+    without writing them. Returns None if the ticker has no price data.
+    """
+    price_series = build_price_series(prices_coll, ticker)
+    if not price_series:
+        return None
 
-    # Fixed DeprecationWarning here
-    today = datetime.now(UTC).date()
-    start_date = today - timedelta(days=days_back)
+    sentiment_by_day = aggregate_sentiment_by_day(news_coll, ticker, start_date)
+    rows = []
 
-    for ticker in TICKERS:
-        print(f"\n=== Aggregating daily metrics for {ticker} ===")
-        price_series = build_price_series(prices_coll, ticker)
+    for d in sorted(price_series.keys()):
+        if d < start_date:
+            continue
+
+        price_info = price_series[d]
+        avg_sentiment, dominant_label, article_count = sentiment_by_day.get(d, (None, None, 0))
+
+        rows.append(
+            {
+                "ticker": ticker,
+                "date": start_of_day(d),
+                "close_price": price_info["close_price"],
+                "daily_return": price_info["daily_return"],
+                "avg_sentiment_score": avg_sentiment,
+                "dominant_sentiment_label": dominant_label,
+                "article_count": article_count,
+            }
+        )
+
+    return rows
+
+
+def aggregate_ticker(news_coll, prices_coll, daily_coll, ticker: str, start_date: date, now: datetime):
+    print(f"\n=== Aggregating daily metrics for {ticker} ===")
+    rows = build_daily_rows(news_coll, prices_coll, ticker, start_date)
+
+    if rows is None:
+        print(f"[WARN] No price data for {ticker}, skipping.")
+        return
+
+    ops = [
+        upsert_daily_metric(
+            ticker,
+            row["date"].date(),
+            row["close_price"],
+            row["daily_return"],
+            row["avg_sentiment_score"],
+            row["dominant_sentiment_label"],
+            row["article_count"],
+            now,
+        )
+        for row in rows
+    ]
+
+    for i in range(0, len(ops), BULK_CHUNK_SIZE):
+        daily_coll.bulk_write(ops[i : i + BULK_CHUNK_SIZE], ordered=False)
+
+    print(f"Finished {ticker}.")
 
-        if not price_series:
-            print(f"[WARN] No price data for {ticker}, skipping.")
+
+def _dominant_label_expr():
+    """
+    $switch equivalent of the dominant-label pick in aggregate_sentiment_by_day:
+    highest non-zero count wins, ties broken in SENTIMENT_LABELS order.
+    """
+    branches = []
+    for label in SENTIMENT_LABELS:
+        others = [other for other in SENTIMENT_LABELS if other != label]
+        branches.append(
+            {
+                "case": {
+                    "$and": [
+                        {"$gt": [f"$_s.{label}", 0]},
+                        *[{"$gte": [f"$_s.{label}", f"$_s.{other}"]} for other in others],
+                    ]
+                },
+                "then": label,
+            }
+        )
+    return {"$switch": {"branches": branches, "default": None}}
+
+
+def _server_side_pipeline(news_coll, ticker: str, start_date: date, now: datetime):
+    """
+    Pipeline on price_snapshots producing the same rows as build_daily_rows:
+    returns via $setWindowFields/$shift, per-day sentiment via $lookup into
+    news_events. Callers append the $merge stage (or read the rows back).
+    """
+    day_ms = 24 * 60 * 60 * 1000
+
+    pipeline = [
+        # Whole series, so the first row in the window still gets its previous close
+        {"$match": {"ticker": ticker}},
+        {
+            "$setWindowFields": {
+                "partitionBy": "$ticker",
+                "sortBy": {"ts": 1},
+                "output": {"_prev_close": {"$shift": {"output": "$close", "by": -1}}},
+            }
+        },
+        {"$set": {"_date": {"$dateTrunc": {"date": "$ts", "unit": "day"}}}},
+        {"$match": {"_date": {"$gte": start_of_day(start_date)}}},
+        {
+            "$lookup": {
+                "from": news_coll.name,
+                "let": {"t": "$ticker", "d": "$_date"},
+                "pipeline": [
+                    {
+                        "$match": {
+                            "$expr": {
+                                "$and": [
+                                    {"$eq": ["$ticker", "$$t"]},
+                                    {"$gte": ["$published_at", "$$d"]},
+                                    {"$lt": ["$published_at", {"$add": ["$$d", day_ms]}]},
+                                ]
+                            },
+                            "sentiment_score": {"$ne": None},
+                        }
+                    },
+                    {
+                        "$group": {
+                            "_id": None,
+                            "avg": {"$avg": "$sentiment_score"},
+                            "n": {"$sum": 1},
+                            **{
+                                label: {"$sum": {"$cond": [{"$eq": ["$sentiment_label", label]}, 1, 0]}}
+                                for label in SENTIMENT_LABELS
+                            },
+                        }
+                    },
+                ],
+                "as": "_sent",
+            }
+        },
+        {"$set": {"_s": {"$first": "$_sent"}}},
+        {
+            "$project": {
+                "_id": 0,
+                "ticker": 1,
+                "date": "$_date",
+                "close_price": "$close",
+                "daily_return": {
+                    "$cond": [
+                        {"$and": [{"$isNumber": "$_prev_close"}, {"$ne": ["$_prev_close", 0]}]},
+                        {"$divide": [{"$subtract": ["$close", "$_prev_close"]}, "$_prev_close"]},
+                        None,
+                    ]
+                },
+                "avg_sentiment_score": {"$ifNull": ["$_s.avg", None]},
+                "dominant_sentiment_label": _dominant_label_expr(),
+                "article_count": {"$ifNull": ["$_s.n", 0]},
+                "updated_at": {"$literal": now},
+            }
+        },
+    ]
+
+    return pipeline
+
+
+def aggregate_ticker_server_side(news_coll, prices_coll, daily_coll, ticker: str, start_date: date, now: datetime):
+    """
+    Same rows as aggregate_ticker, built inside MongoDB and written with $merge
+    on the uniq_ticker_date key. No price or news rows leave the server.
+    """
+    print(f"\n=== Aggregating daily metrics for {ticker} (server-side) ===")
+
+    pipeline = _server_side_pipeline(news_coll, ticker, start_date, now) + [
+        {
+            "$merge": {
+                "into": daily_coll.name,
+                "on": ["ticker", "date"],
+                "whenMatched": "merge",
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+
+    prices_coll.aggregate(pipeline)
+    print(f"Finished {ticker}.")
+
+
+def _same_value(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12)
+    return a == b
+
+
+def check_server_side_matches(days_back: int = 30):
+    """
+    Run both aggregation paths read-only and compare the rows they would write.
+    Raises RuntimeError listing the first mismatches; writes nothing.
+    """
+    news_coll, prices_coll, _ = get_collections()
+    now = datetime.now(UTC)
+    start_date = now.date() - timedelta(days=days_back)
+
+    fields = [
+        "ticker",
+        "date",
+        "close_price",
+        "daily_return",
+        "avg_sentiment_score",
+        "dominant_sentiment_label",
+        "article_count",
+    ]
+    mismatches = []
+
+    for ticker in TICKERS:
+        py_rows = build_daily_rows(news_coll, prices_coll, ticker, start_date) or []
+        server_rows = sorted(
+            prices_coll.aggregate(_server_side_pipeline(news_coll, ticker, start_date, now)),
+            key=lambda row: row["date"],
+        )
+
+        if len(py_rows) != len(server_rows):
+            mismatches.append(f"{ticker}: {len(py_rows)} Python rows vs {len(server_rows)} server-side rows")
             continue
 
-        for d in sorted(price_series.keys()):
-            if d < start_date:
-                continue
+        for py_row, server_row in zip(py_rows, server_rows):
+            for field in fields:
+                if not _same_value(py_row[field], server_row.get(field)):
+                    mismatches.append(
+                        f"{ticker} {py_row['date']:%Y-%m-%d} {field}: "
+                        f"{py_row[field]!r} vs {server_row.get(field)!r}"
+                    )
 
-            price_info = price_series[d]
-            close_price = price_info["close_price"]
-            daily_return = price_info["daily_return"]
+        print(f"{ticker}: compared {len(py_rows)} rows.")
 
-            avg_sentiment, dominant_label, article_count = aggregate_sentiment_for_day(
-                news_coll, ticker, d
-            )
+    if mismatches:
+        raise RuntimeError("Server-side aggregation differs:\n" + "\n".join(mismatches[:20]))
+    print("Server-side aggregation matches the Python path.")
 
-            upsert_daily_metric(
-                daily_coll,
-                ticker,
-                d,
-                close_price,
-                daily_return,
-                avg_sentiment,
-                dominant_label,
-                article_count,
-            )
 
-        print(f"Finished {ticker}.")
+def run_daily_aggregation(days_back: int = 90, server_side: bool = False):
+    """
+    server_side=True builds the rows inside MongoDB with $merge instead;
+    check_server_side_matches compares the two paths.
+    """
+    news_coll, prices_coll, daily_coll = get_collections()
+
+    # One aware "now" per run, shared by the window start and every updated_at
+    now = datetime.now(UTC)
+    start_date = now.date() - timedelta(days=days_back)
+
+    aggregate = aggregate_ticker_server_side if server_side else aggregate_ticker
+
+    # Tickers are independent; PyMongo releases the GIL on socket I/O,
+    # so threads overlap the DB round trips. Collections share one pool.
+    with ThreadPoolExecutor(max_workers=len(TICKERS)) as ex:
+        futures = {
+            ex.submit(aggregate, news_coll, prices_coll, daily_coll, t, start_date, now): t
+            for t in TICKERS
+        }
+        for future in as_completed(futures):
+            future.result()
 
 
 if __name__ == "__main__":
-    run_daily_aggregation(days_back=30)
\ No newline at end of file
+    if "--check-server-side" in sys.argv:
+        check_server_side_matches(days_back=30)
+    else:
+        run_daily_aggregation(days_back=30, server_side="--server-side" in sys.argv)
\ No newline at end of file
@@ -1,9 +1,15 @@
 import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, UTC
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Tuple, Optional
 
+import numpy as np
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne
 
 # Load .env from project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,20 +22,51 @@ MONGO_DB_NAME = os.getenv("MONGO_DB", "financial_news")
 # Same ticker set
 TICKERS = ["AAPL", "MSFT", "TSLA", "NVDA"]
 
+# Max updates per bulk_write call
+BULK_CHUNK_SIZE = 1000
+
+
+@lru_cache(maxsize=1)
+def _client():
+    """
+    One MongoClient (and connection pool) per process, created on first use.
+    """
+    return MongoClient(MONGO_URI, maxPoolSize=50)
+
 
 def get_daily_collection():
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
-    coll = db["daily_ticker_metrics"]
+    coll = _client()[MONGO_DB_NAME]["daily_ticker_metrics"]
 
+    # Same spec/name as daily_aggregator; a second name for these keys is rejected
     coll.create_index(
         [("ticker", ASCENDING), ("date", ASCENDING)],
-        name="idx_ticker_date",
+        unique=True,
+        name="uniq_ticker_date",
     )
 
     return coll
 
 
+def corr_from_sums(n: int, sx: float, sy: float, sxy: float, sxx: float, syy: float) -> Optional[float]:
+    """
+    Pearson correlation from running sums, using the computational form
+    (n·Σxy − ΣxΣy) / sqrt((n·Σx² − (Σx)²)(n·Σy² − (Σy)²)).
+    Returns None if fewer than 2 points or either variance is (numerically) zero.
+    """
+    if n < 2:
+        return None
+
+    den_x = n * sxx - sx * sx
+    den_y = n * syy - sy * sy
+
+    # Cancellation can leave a tiny non-zero value for a constant series
+    if den_x <= 1e-12 * max(n * sxx, 1.0) or den_y <= 1e-12 * max(n * syy, 1.0):
+        return None
+
+    corr = (n * sxy - sx * sy) / (den_x * den_y) ** 0.5
+    return max(-1.0, min(1.0, corr))
+
+
 def pearson_corr(pairs: List[Tuple[float, float]]) -> Optional[float]:
     """
     Compute Pearson correlation for a list of (x, y) pairs.
@@ -39,79 +76,297 @@ def pearson_corr(pairs: List[Tuple[float, float]]) -> Optional[float]:
     if n < 2:
         return None
 
-    xs = [p[0] for p in pairs]
-    ys = [p[1] for p in pairs]
+    a = np.asarray(pairs, dtype=np.float64)
+    x = a[:, 0]
+    y = a[:, 1]
+
+    return corr_from_sums(
+        n,
+        float(x.sum()),
+        float(y.sum()),
+        float(x @ y),
+        float(x @ x),
+        float(y @ y),
+    )
 
-    mean_x = sum(xs) / n
-    mean_y = sum(ys) / n
 
-    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
-    den_x = sum((x - mean_x) ** 2 for x in xs)
-    den_y = sum((y - mean_y) ** 2 for y in ys)
+# Fields the rolling correlation reads from each daily row
+_CORR_PROJECTION = {"_id": 1, "ticker": 1, "date": 1, "daily_return": 1, "avg_sentiment_score": 1}
 
-    if den_x == 0 or den_y == 0:
-        return None
 
-    return num / (den_x * den_y) ** 0.5
+def load_daily_rows(coll, tickers: List[str]) -> Dict[str, List[dict]]:
+    """
+    Fetch every ticker's daily rows in one indexed range scan on
+    (ticker, date) and split them per ticker, in date order.
+    """
+    cursor = (
+        coll.find({"ticker": {"$in": tickers}}, _CORR_PROJECTION)
+        .sort([("ticker", ASCENDING), ("date", ASCENDING)])
+        .batch_size(5000)
+    )
+    return {ticker: list(rows) for ticker, rows in groupby(cursor, key=lambda d: d["ticker"])}
+
+
+def rolling_corr_values(docs: List[dict], window: int = 7) -> Iterator[Tuple[Any, Optional[float]]]:
+    """
+    Yield (_id, rolling correlation) for each of a ticker's date-sorted rows,
+    between daily_return and avg_sentiment_score over the last `window` rows.
+    """
+    # (ret, sent) for each row in the current window; either may be None.
+    # Bounded, so append() evicts the oldest row in O(1).
+    history = deque(maxlen=window)
+
+    # Running sums over the valid pairs in the window, updated in O(1) per row
+    n = 0
+    sx = sy = sxy = sxx = syy = 0.0
+
+    for doc in docs:
+        daily_ret = doc.get("daily_return")
+        sent = doc.get("avg_sentiment_score")
+
+        if len(history) == window:
+            # history[0] is about to be evicted by append()
+            old_ret, old_sent = history[0]
+            if old_ret is not None and old_sent is not None:
+                x, y = float(old_ret), float(old_sent)
+                n -= 1
+                sx -= x
+                sy -= y
+                sxy -= x * y
+                sxx -= x * x
+                syy -= y * y
+
+        history.append((daily_ret, sent))
+        if daily_ret is not None and sent is not None:
+            x, y = float(daily_ret), float(sent)
+            n += 1
+            sx += x
+            sy += y
+            sxy += x * y
+            sxx += x * x
+            syy += y * y
 
+        if n == 0:
+            # Drop accumulated rounding drift whenever the window empties
+            sx = sy = sxy = sxx = syy = 0.0
 
-def update_rolling_corr_for_ticker(coll, ticker: str, window: int = 7):
+        yield doc["_id"], corr_from_sums(n, sx, sy, sxy, sxx, syy)
+
+
+def update_rolling_corr_for_ticker(coll, ticker: str, window: int = 7, docs: Optional[List[dict]] = None):
     """
     For a single ticker:
       - sort daily rows by date
       - compute rolling 7-day correlation between daily_return and avg_sentiment_score
       - store result in field rolling_corr_7d
+
+    docs, if given, are the ticker's rows already sorted by date (see load_daily_rows).
     """
-    cursor = coll.find({"ticker": ticker}).sort("date", ASCENDING)
-    docs = list(cursor)
+    if docs is None:
+        cursor = (
+            coll.find({"ticker": ticker}, _CORR_PROJECTION)
+            .sort("date", ASCENDING)
+            .batch_size(5000)
+        )
+        docs = list(cursor)
 
     if not docs:
         print(f"[WARN] No daily metrics for {ticker}")
         return
 
-    history = []  # list of dicts: {"ret": float or None, "sent": float or None, "date": datetime}
-
     updated = 0
+    ops = []
+    # One timestamp for every row updated in this run
+    run_ts = datetime.now(UTC)
 
-    for doc in docs:
-        d = doc["date"]
-        daily_ret = doc.get("daily_return")
-        sent = doc.get("avg_sentiment_score")
-
-        history.append({"date": d, "ret": daily_ret, "sent": sent})
-        if len(history) > window:
-            history.pop(0)
-
-        # Build list of valid (ret, sent) in the current window
-        pairs = [
-            (h["ret"], h["sent"])
-            for h in history
-            if h["ret"] is not None and h["sent"] is not None
-        ]
-
-        corr = pearson_corr(pairs) if pairs else None
-
-        coll.update_one(
-            {"_id": doc["_id"]},
-            {
-                "$set": {
-                    "rolling_corr_7d": corr,
-                    "corr_updated_at": datetime.now(UTC),
-                }
-            },
+    for _id, corr in rolling_corr_values(docs, window):
+        ops.append(
+            UpdateOne(
+                {"_id": _id},
+                {
+                    "$set": {
+                        "rolling_corr_7d": corr,
+                        "corr_updated_at": run_ts,
+                    }
+                },
+            )
         )
-        updated += 1
+
+        if len(ops) >= BULK_CHUNK_SIZE:
+            updated += coll.bulk_write(ops, ordered=False).matched_count
+            ops = []
+
+    if ops:
+        updated += coll.bulk_write(ops, ordered=False).matched_count
 
     print(f"{ticker}: updated rolling_corr_7d for {updated} daily rows.")
 
 
-def run_rolling_corr(window: int = 7):
+def _server_side_corr_pipeline(ticker: str, window: int = 7):
+    """
+    $setWindowFields pipeline yielding {_id, rolling_corr_7d, corr_updated_at}
+    per daily row, with the same running-sum formula as rolling_corr_values
+    over the valid (daily_return, avg_sentiment_score) pairs in each window.
+    Callers append the $merge stage (or read the rows back).
+    """
+    bounds = {"window": {"documents": [-(window - 1), 0]}}
+    n = "$_sn"
+    sx, sy, sxy, sxx, syy = "$_sx", "$_sy", "$_sxy", "$_sxx", "$_syy"
+
+    def variance_term(s, ss):
+        return {"$subtract": [{"$multiply": [n, ss]}, {"$multiply": [s, s]}]}
+
+    def nonzero(den, ss):
+        # Mirrors the cancellation guard in corr_from_sums
+        return {"$gt": [den, {"$multiply": [1e-12, {"$max": [{"$multiply": [n, ss]}, 1.0]}]}]}
+
+    pipeline = [
+        {"$match": {"ticker": ticker}},
+        {
+            "$set": {
+                "_valid": {
+                    "$and": [
+                        {"$isNumber": "$daily_return"},
+                        {"$isNumber": "$avg_sentiment_score"},
+                    ]
+                }
+            }
+        },
+        {
+            "$set": {
+                "_n": {"$cond": ["$_valid", 1, 0]},
+                "_x": {"$cond": ["$_valid", "$daily_return", 0.0]},
+                "_y": {"$cond": ["$_valid", "$avg_sentiment_score", 0.0]},
+            }
+        },
+        {
+            "$setWindowFields": {
+                "partitionBy": "$ticker",
+                "sortBy": {"date": 1},
+                "output": {
+                    "_sn": {"$sum": "$_n", **bounds},
+                    "_sx": {"$sum": "$_x", **bounds},
+                    "_sy": {"$sum": "$_y", **bounds},
+                    "_sxy": {"$sum": {"$multiply": ["$_x", "$_y"]}, **bounds},
+                    "_sxx": {"$sum": {"$multiply": ["$_x", "$_x"]}, **bounds},
+                    "_syy": {"$sum": {"$multiply": ["$_y", "$_y"]}, **bounds},
+                },
+            }
+        },
+        {"$set": {"_dx": variance_term(sx, sxx), "_dy": variance_term(sy, syy)}},
+        {
+            "$project": {
+                "_id": 1,
+                "rolling_corr_7d": {
+                    "$cond": [
+                        {"$and": [{"$gte": [n, 2]}, nonzero("$_dx", sxx), nonzero("$_dy", syy)]},
+                        {
+                            "$max": [
+                                -1.0,
+                                {
+                                    "$min": [
+                                        1.0,
+                                        {
+                                            "$divide": [
+                                                {"$subtract": [{"$multiply": [n, sxy]}, {"$multiply": [sx, sy]}]},
+                                                {"$sqrt": {"$multiply": ["$_dx", "$_dy"]}},
+                                            ]
+                                        },
+                                    ]
+                                },
+                            ]
+                        },
+                        None,
+                    ]
+                },
+                "corr_updated_at": "$$NOW",
+            }
+        },
+    ]
+
+    return pipeline
+
+
+def update_rolling_corr_server_side(coll, ticker: str, window: int = 7):
+    """
+    Same result as update_rolling_corr_for_ticker, computed inside MongoDB
+    and written back with $merge, so the series never leaves the server.
+    """
+    pipeline = _server_side_corr_pipeline(ticker, window) + [
+        {
+            "$merge": {
+                "into": coll.name,
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard",
+            }
+        },
+    ]
+
+    coll.aggregate(pipeline)
+    print(f"{ticker}: updated rolling_corr_7d server-side.")
+
+
+def check_server_side_matches(window: int = 7):
+    """
+    Compute the rolling correlation both ways, read-only, and compare per row.
+    Raises RuntimeError listing the first mismatches; writes nothing.
+    """
     coll = get_daily_collection()
+    rows_by_ticker = load_daily_rows(coll, TICKERS)
+    mismatches = []
 
     for ticker in TICKERS:
+        py_corr = dict(rolling_corr_values(rows_by_ticker.get(ticker, []), window))
+        server_corr = {
+            doc["_id"]: doc.get("rolling_corr_7d")
+            for doc in coll.aggregate(_server_side_corr_pipeline(ticker, window))
+        }
+
+        if py_corr.keys() != server_corr.keys():
+            mismatches.append(f"{ticker}: {len(py_corr)} Python rows vs {len(server_corr)} server-side rows")
+            continue
+
+        for _id, a in py_corr.items():
+            b = server_corr[_id]
+            # Sliding sums and per-window $sum round differently; 2-point
+            # windows (corr = ±1) show the most cancellation, around 1e-8
+            if (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-6):
+                mismatches.append(f"{ticker} {_id}: {a!r} vs {b!r}")
+
+        print(f"{ticker}: compared {len(py_corr)} rows.")
+
+    if mismatches:
+        raise RuntimeError("Server-side rolling correlation differs:\n" + "\n".join(mismatches[:20]))
+    print("Server-side rolling correlation matches the Python path.")
+
+
+def run_rolling_corr(window: int = 7, server_side: bool = False):
+    """
+    server_side=True pushes the computation into MongoDB instead;
+    check_server_side_matches compares the two paths.
+    """
+    coll = get_daily_collection()
+
+    # One query for all tickers instead of one per ticker
+    rows_by_ticker = {} if server_side else load_daily_rows(coll, TICKERS)
+
+    def _process(ticker: str):
         print(f"\n=== Computing {window}-day rolling correlation for {ticker} ===")
-        update_rolling_corr_for_ticker(coll, ticker, window=window)
+        if server_side:
+            update_rolling_corr_server_side(coll, ticker, window=window)
+        else:
+            update_rolling_corr_for_ticker(coll, ticker, window=window, docs=rows_by_ticker.get(ticker, []))
+
+    # Tickers are independent; threads overlap the per-ticker DB writes
+    with ThreadPoolExecutor(max_workers=len(TICKERS)) as ex:
+        futures = {ex.submit(_process, t): t for t in TICKERS}
+        for future in as_completed(futures):
+            future.result()
 
 
 if __name__ == "__main__":
-    run_rolling_corr(window=7)
+    if "--check-server-side" in sys.argv:
+        check_server_side_matches(window=7)
+    else:
+        run_rolling_corr(window=7, server_side="--server-side" in sys.argv)
@@ -1,8 +1,11 @@
 import os
+from collections import OrderedDict
 from functools import lru_cache
+from typing import Dict, List, Tuple
 
+import torch
 from dotenv import load_dotenv
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 env_path = os.path.join(BASE_DIR, ".env")
@@ -10,49 +13,43 @@ load_dotenv(env_path)
 
 FINBERT_MODEL_NAME = "ProsusAI/finbert"
 
+# Opt-in dynamic int8 quantization of the linear layers when running on CPU
+FINBERT_CPU_INT8 = os.getenv("FINBERT_CPU_INT8", "0") == "1"
 
-@lru_cache(maxsize=1)
-def get_finbert_pipeline():
-    """
-    Lazily load FinBERT sentiment pipeline once.
-    """
-    print("Loading FinBERT model... (first call will be slow)")
-
-    tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL_NAME)
-    model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL_NAME)
-
-    nlp = pipeline(
-        "text-classification",
-        model=model,
-        tokenizer=tokenizer,
-        top_k=None,
-        truncation=True,
-    )
+# Headlines are short; 64 tokens covers them and keeps attention cheap
+MAX_TOKENS = 64
 
-    return nlp
+# Wire reprints repeat headlines verbatim, so keep recent (label, score) results.
+# Keyed on the stripped headline only; the model output is a pure function of it.
+SCORE_CACHE_MAXSIZE = 50_000
+_SCORE_CACHE: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
 
 
-def normalize_outputs(outputs):
+@lru_cache(maxsize=1)
+def get_finbert_model():
     """
-    Normalize different Hugging Face pipeline output shapes into list[dict].
+    Lazily load FinBERT tokenizer + model once.
+    Returns (tokenizer, model, device, (pos_idx, neg_idx, neu_idx)).
     """
+    print("Loading FinBERT model... (first call will be slow)")
 
-    if isinstance(outputs, dict):
-        return [outputs]
+    # GPU in FP16 when available, otherwise CPU in FP32
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    dtype = torch.float16 if device.type == "cuda" else torch.float32
 
-    if isinstance(outputs, list):
-        if not outputs:
-            return []
+    tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL_NAME, torch_dtype=dtype)
+    model.eval()
 
-        first = outputs[0]
+    if device.type == "cpu" and FINBERT_CPU_INT8:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
 
-        if isinstance(first, dict):
-            return outputs
+    model.to(device)
 
-        if isinstance(first, list):
-            return first
+    label_to_idx = {label.lower(): int(i) for i, label in model.config.id2label.items()}
+    label_idx = (label_to_idx["positive"], label_to_idx["negative"], label_to_idx["neutral"])
 
-    return []
+    return tokenizer, model, device, label_idx
 
 
 def analyze_headline(headline: str):
@@ -67,37 +64,81 @@ def analyze_headline(headline: str):
     score:
     - positive_score - negative_score
     """
+    return analyze_headlines_batch([headline])[0]
 
-    nlp = get_finbert_pipeline()
 
-    text = headline.strip() if headline else ""
+def _preprocess(text: str) -> str:
+    return text.strip() if text else ""
 
-    if not text:
-        return "neutral", 0.0
 
-    outputs = nlp(text)
-    class_outputs = normalize_outputs(outputs)
-
-    if not class_outputs:
-        return "neutral", 0.0
-
-    scores = {
-        item.get("label", "").lower(): float(item.get("score", 0.0))
-        for item in class_outputs
-        if isinstance(item, dict)
-    }
-
-    pos = scores.get("positive", 0.0)
-    neg = scores.get("negative", 0.0)
-    neu = scores.get("neutral", 0.0)
-
-    score = float(pos - neg)
-
-    if pos >= neg and pos >= neu:
-        label = "bullish"
-    elif neg >= pos and neg >= neu:
-        label = "bearish"
-    else:
-        label = "neutral"
+def _score_texts(texts: List[str], batch_size: int) -> List[Tuple[str, float]]:
+    """
+    Run batched FinBERT forward passes over non-empty texts.
+    """
+    tokenizer, model, device, (pos_idx, neg_idx, neu_idx) = get_finbert_model()
+    results: List[Tuple[str, float]] = []
+
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start : start + batch_size]
+
+        with torch.inference_mode():
+            enc = tokenizer(
+                chunk,
+                padding=True,
+                truncation=True,
+                max_length=MAX_TOKENS,
+                return_tensors="pt",
+            ).to(device)
+            probs = model(**enc).logits.float().softmax(-1)
+
+        pos = probs[:, pos_idx]
+        neg = probs[:, neg_idx]
+        neu = probs[:, neu_idx]
+
+        scores = (pos - neg).cpu().tolist()
+        # Same tie-breaking as before: bullish, then bearish, then neutral
+        bullish = ((pos >= neg) & (pos >= neu)).cpu().tolist()
+        bearish = ((neg >= pos) & (neg >= neu)).cpu().tolist()
+
+        for score, is_bull, is_bear in zip(scores, bullish, bearish):
+            if is_bull:
+                label = "bullish"
+            elif is_bear:
+                label = "bearish"
+            else:
+                label = "neutral"
+            results.append((label, float(score)))
+
+    return results
+
+
+def analyze_headlines_batch(texts: List[str], batch_size: int = 32) -> List[Tuple[str, float]]:
+    """
+    Run FinBERT over many headlines with direct batched forward passes.
+    Returns (label, score) per input, in the same order.
 
-    return label, score
\ No newline at end of file
+    Duplicate headlines in the input and ones already in the score cache
+    are not sent to the model.
+    """
+    cleaned = [_preprocess(t) for t in texts]
+
+    lookup: Dict[str, Tuple[str, float]] = {}
+    misses: List[str] = []
+    for text in dict.fromkeys(cleaned):
+        if not text:
+            continue
+        hit = _SCORE_CACHE.get(text)
+        if hit is not None:
+            _SCORE_CACHE.move_to_end(text)
+            lookup[text] = hit
+        else:
+            misses.append(text)
+
+    if misses:
+        for text, result in zip(misses, _score_texts(misses, batch_size)):
+            lookup[text] = result
+            _SCORE_CACHE[text] = result
+        while len(_SCORE_CACHE) > SCORE_CACHE_MAXSIZE:
+            _SCORE_CACHE.popitem(last=False)
+
+    return [lookup[text] if text else ("neutral", 0.0) for text in cleaned]
@@ -1,11 +1,11 @@
 import os
-from datetime import datetime
+from datetime import datetime, UTC
+from functools import lru_cache
 
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from bson.objectid import ObjectId
+from pymongo import MongoClient, ASCENDING, UpdateOne
 
-from services.processor.finbert_model import analyze_headline
+from services.processor.finbert_model import analyze_headlines_batch
 
 # Load .env from project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,20 +16,51 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB", "financial_news")
 
 
+@lru_cache(maxsize=1)
+def _client():
+    """
+    One MongoClient (and connection pool) per process, created on first use.
+    """
+    return MongoClient(MONGO_URI, maxPoolSize=50)
+
+
+@lru_cache(maxsize=1)
 def get_collection():
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
-    return db["news_events"]
+    """
+    Return news_events, creating the worker's indexes on first use.
+    """
+    coll = _client()[MONGO_DB_NAME]["news_events"]
+
+    # fetch_unscored_batch: unscored docs sorted by published_at. Partial, so the
+    # index only holds the backlog and docs drop out of it once scored.
+    coll.create_index(
+        [("published_at", ASCENDING)],
+        partialFilterExpression={"sentiment_score": None},
+        name="idx_unscored_partial",
+    )
+    # Same spec/name the ingestor creates, so this is a no-op if it already exists
+    coll.create_index(
+        [("ticker", ASCENDING), ("published_at", ASCENDING)],
+        name="ticker_pub_range",
+    )
+
+    return coll
 
 
 def fetch_unscored_batch(coll, batch_size=50):
     """
     Fetch a batch of documents where sentiment_score is None.
     """
-    cursor = coll.find(
-        {"sentiment_score": None},
-        {"headline": 1},  # only need headline + _id
-    ).sort("published_at", 1).limit(batch_size)
+    cursor = (
+        coll.find(
+            {"sentiment_score": None},
+            {"headline": 1},  # only need headline + _id
+        )
+        .sort("published_at", 1)
+        .hint("idx_unscored_partial")  # partial index created in get_collection()
+        .limit(batch_size)
+        .batch_size(batch_size)  # whole batch in the first reply, no getMore
+    )
 
     return list(cursor)
 
@@ -44,25 +75,26 @@ def process_batch(batch_size=50):
 
     print(f"Processing batch of {len(docs)} documents...")
 
-    updated_count = 0
+    headlines = [doc.get("headline", "") for doc in docs]
+    results = analyze_headlines_batch(headlines)
+    scored_at = datetime.now(UTC)
 
-    for doc in docs:
-        _id = doc["_id"]
-        headline = doc.get("headline", "")
-
-        label, score = analyze_headline(headline)
-
-        coll.update_one(
-            {"_id": ObjectId(_id)},
+    ops = [
+        UpdateOne(
+            {"_id": doc["_id"]},
             {
                 "$set": {
                     "sentiment_label": label,
                     "sentiment_score": score,
-                    "sentiment_updated_at": datetime.utcnow(),
+                    "sentiment_updated_at": scored_at,
                 }
             },
         )
-        updated_count += 1
+        for doc, (label, score) in zip(docs, results)
+    ]
+
+    result = coll.bulk_write(ops, ordered=False)
+    updated_count = result.matched_count
 
     print(f"Updated {updated_count} documents in this batch.")
     return updated_count
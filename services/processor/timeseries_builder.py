@@ -1,8 +1,10 @@
 import os
 from datetime import datetime, timedelta, UTC
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, TypedDict
 
 from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 
 # Load .env from project root
@@ -14,10 +16,44 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB", "financial_news")
 
 
+class TimeSeriesPointDict(TypedDict):
+    date: str
+    close_price: Optional[float]
+    daily_return: Optional[float]
+    avg_sentiment: Optional[float]
+    dominant_sentiment: Optional[str]
+    article_count: int
+    rolling_corr_7d: Optional[float]
+
+
+class TimeSeriesPayload(TypedDict, total=False):
+    ticker: str
+    from_date: str
+    to_date: str
+    points: List[TimeSeriesPointDict]
+
+
+# Async client for the API; created on first use so it binds to the running event loop
+_ASYNC_CLIENT = None
+
+
+@lru_cache(maxsize=1)
+def _client():
+    """
+    One MongoClient (and connection pool) per process, created on first use.
+    """
+    return MongoClient(MONGO_URI, maxPoolSize=50, minPoolSize=5, socketTimeoutMS=5000)
+
+
 def get_daily_collection():
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
-    return db["daily_ticker_metrics"]
+    return _client()[MONGO_DB_NAME]["daily_ticker_metrics"]
+
+
+def get_async_daily_collection():
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        _ASYNC_CLIENT = AsyncIOMotorClient(MONGO_URI, maxPoolSize=50, socketTimeoutMS=5000)
+    return _ASYNC_CLIENT[MONGO_DB_NAME]["daily_ticker_metrics"]
 
 
 def get_latest_date_for_ticker(coll, ticker: str):
@@ -36,10 +72,38 @@ def get_latest_date_for_ticker(coll, ticker: str):
     return d.date()
 
 
+def _window_start(latest_date, days_back: int):
+    start_date = latest_date - timedelta(days=days_back - 1)
+    start_dt = datetime(start_date.year, start_date.month, start_date.day)
+    return start_date, start_dt
+
+
+def _doc_to_point(doc) -> TimeSeriesPointDict:
+    d: datetime = doc["date"]
+    return {
+        "date": d.strftime("%Y-%m-%d"),
+        "close_price": doc.get("close_price"),
+        "daily_return": doc.get("daily_return"),
+        "avg_sentiment": doc.get("avg_sentiment_score"),
+        "dominant_sentiment": doc.get("dominant_sentiment_label"),
+        "article_count": doc.get("article_count", 0),
+        "rolling_corr_7d": doc.get("rolling_corr_7d"),
+    }
+
+
+def _timeseries_payload(ticker: str, start_date, latest_date, points: List[TimeSeriesPointDict]) -> TimeSeriesPayload:
+    return {
+        "ticker": ticker,
+        "from_date": start_date.strftime("%Y-%m-%d"),
+        "to_date": latest_date.strftime("%Y-%m-%d"),
+        "points": points,
+    }
+
+
 def build_ticker_timeseries(
     ticker: str,
     days_back: int = 30,
-) -> Dict[str, Any]:
+) -> TimeSeriesPayload:
     """
     Build a JSON-ready time series structure for a given ticker.
 
@@ -58,8 +122,7 @@ def build_ticker_timeseries(
     if latest_date is None:
         return {"ticker": ticker, "points": []}
 
-    start_date = latest_date - timedelta(days=days_back - 1)
-    start_dt = datetime(start_date.year, start_date.month, start_date.day)
+    start_date, start_dt = _window_start(latest_date, days_back)
 
     cursor = coll.find(
         {
@@ -67,30 +130,70 @@ def build_ticker_timeseries(
             "date": {"$gte": start_dt},
         },
         sort=[("date", 1)],
+        batch_size=5000,
     )
 
-    points: List[Dict[str, Any]] = []
-
-    for doc in cursor:
-        d: datetime = doc["date"]  
-        points.append(
-            {
-                "date": d.strftime("%Y-%m-%d"),
-                "close_price": doc.get("close_price"),
-                "daily_return": doc.get("daily_return"),
-                "avg_sentiment": doc.get("avg_sentiment_score"),
-                "dominant_sentiment": doc.get("dominant_sentiment_label"),
-                "article_count": doc.get("article_count", 0),
-                "rolling_corr_7d": doc.get("rolling_corr_7d"),
-            }
-        )
+    points: List[TimeSeriesPointDict] = [_doc_to_point(doc) for doc in cursor]
 
-    return {
-        "ticker": ticker,
-        "from_date": start_date.strftime("%Y-%m-%d"),
-        "to_date": latest_date.strftime("%Y-%m-%d"),
-        "points": points,
-    }
+    return _timeseries_payload(ticker, start_date, latest_date, points)
+
+
+async def get_latest_daily_doc_async(ticker: str) -> Optional[Dict[str, Any]]:
+    """
+    Latest daily row for a ticker: one indexed point read on (ticker, date).
+    Every aggregator / correlation run stamps the rows in its window, so this
+    row carries the newest updated_at and corr_updated_at as well.
+    """
+    coll = get_async_daily_collection()
+    return await coll.find_one(
+        {"ticker": ticker},
+        sort=[("date", -1)],
+        projection={"date": 1, "updated_at": 1, "corr_updated_at": 1},
+    )
+
+
+def data_version(latest_doc: Dict[str, Any]) -> str:
+    """
+    Short token that changes whenever the ticker's daily rows change.
+    """
+    parts = [latest_doc.get(k) for k in ("date", "updated_at", "corr_updated_at")]
+    return "-".join(str(int(p.timestamp() * 1000)) if p else "0" for p in parts)
+
+
+async def build_ticker_timeseries_async(
+    ticker: str,
+    days_back: int = 30,
+    latest_doc: Optional[Dict[str, Any]] = None,
+) -> TimeSeriesPayload:
+    """
+    Same as build_ticker_timeseries, but reads through motor so the API's
+    event loop is free while Mongo responds.
+
+    latest_doc, if given, is the result of get_latest_daily_doc_async and
+    saves repeating that lookup.
+    """
+    coll = get_async_daily_collection()
+
+    if latest_doc is None:
+        latest_doc = await get_latest_daily_doc_async(ticker)
+    if not latest_doc:
+        return {"ticker": ticker, "points": []}
+
+    latest_date = latest_doc["date"].date()
+    start_date, start_dt = _window_start(latest_date, days_back)
+
+    cursor = coll.find(
+        {
+            "ticker": ticker,
+            "date": {"$gte": start_dt},
+        },
+        sort=[("date", 1)],
+        batch_size=5000,
+    )
+
+    points: List[TimeSeriesPointDict] = [_doc_to_point(doc) async for doc in cursor]
+
+    return _timeseries_payload(ticker, start_date, latest_date, points)
 
 
 if __name__ == "__main__":